@@ -1,11 +1,23 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 import numpy as np
 import datetime
 import plotly.graph_objects as go
-from datetime import timedelta
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import re
+import io
+import os
+import json
+import tempfile
+import gzip
+import zipfile
+import time
+from pathlib import Path
 from dateutil.relativedelta import relativedelta
 
 # Page configuration
@@ -68,6 +80,8 @@ st.markdown(f"""
     .success-box {{padding: 1rem; border-radius: 5px; margin: 1rem 0;}}
     .info-box {{padding: 1rem; border-radius: 5px; margin: 1rem 0;}}
     .metric-card {{padding: 1rem; border-radius: 5px; margin-bottom: 1rem; text-align: center;}}
+    .metric-row {{display: flex; gap: 1rem;}}
+    .metric-row .metric-card {{flex: 1;}}
 </style>
 """, unsafe_allow_html=True)
 
@@ -88,239 +102,353 @@ except Exception as e:
 # ------------------------
 # URL Parsing Functions
 # ------------------------
+# Compiled once at import; the tag tells get_channel_id_from_identifier how to resolve the match
+CHANNEL_URL_PATTERNS = (
+    (re.compile(r'youtube\.com/channel/([^/\s?]+)'), 'channel'),
+    (re.compile(r'youtube\.com/c/([^/\s?]+)'), 'custom'),
+    (re.compile(r'youtube\.com/user/([^/\s?]+)'), 'user'),
+    (re.compile(r'youtube\.com/@([^/\s?]+)'), 'handle')
+)
+# The id is used in cache file names, so anything beyond the fixed UC + 22 base64url form is rejected
+CHANNEL_ID_PATTERN = re.compile(r'UC[\w-]{22}')
+
 def extract_channel_id(url):
-    patterns = [
-        r'youtube\.com/channel/([^/\s?]+)',
-        r'youtube\.com/c/([^/\s?]+)',
-        r'youtube\.com/user/([^/\s?]+)',
-        r'youtube\.com/@([^/\s?]+)'
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, url)
+    for pattern, tag in CHANNEL_URL_PATTERNS:
+        match = pattern.search(url)
         if match:
             identifier = match.group(1)
-            if pattern == patterns[0] and identifier.startswith('UC'):
-                return identifier
-            return get_channel_id_from_identifier(identifier, pattern)
-    if url.strip().startswith('UC'):
+            # /channel/ URLs already carry the id, so only the other forms need an API lookup
+            if tag == 'channel':
+                return identifier if CHANNEL_ID_PATTERN.fullmatch(identifier) else None
+            try:
+                return get_channel_id_from_identifier(identifier, tag)
+            except Exception as e:
+                st.error(f"Error resolving channel identifier: {describe_request_error(e)}")
+                return None
+    if CHANNEL_ID_PATTERN.fullmatch(url.strip()):
         return url.strip()
     return None
 
+VIDEO_URL_PATTERNS = (
+    re.compile(r'youtube\.com/watch\?v=([^&\s]+)'),
+    re.compile(r'youtu\.be/([^?\s]+)'),
+    re.compile(r'youtube\.com/embed/([^?\s]+)'),
+    re.compile(r'youtube\.com/v/([^?\s]+)')
+)
+VIDEO_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+@lru_cache(maxsize=256)
 def extract_video_id(url):
-    patterns = [
-        r'youtube\.com/watch\?v=([^&\s]+)',
-        r'youtu\.be/([^?\s]+)',
-        r'youtube\.com/embed/([^?\s]+)',
-        r'youtube\.com/v/([^?\s]+)'
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, url)
+    for pattern in VIDEO_URL_PATTERNS:
+        match = pattern.search(url)
         if match:
             return match.group(1)
-    if re.match(r'^[A-Za-z0-9_-]{11}$', url.strip()):
+    if VIDEO_ID_PATTERN.match(url.strip()):
         return url.strip()
     return None
 
-def get_channel_id_from_identifier(identifier, pattern_used):
-    try:
-        if pattern_used == r'youtube\.com/channel/([^/\s?]+)':
-            return identifier
-        elif pattern_used == r'youtube\.com/c/([^/\s?]+)':
-            search_url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&type=channel&q={identifier}&key={yt_api_key}"
-        elif pattern_used == r'youtube\.com/user/([^/\s?]+)':
-            username_url = f"https://www.googleapis.com/youtube/v3/channels?part=id&forUsername={identifier}&key={yt_api_key}"
-            username_res = requests.get(username_url).json()
-            if 'items' in username_res and username_res['items']:
-                return username_res['items'][0]['id']
-            search_url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&type=channel&q={identifier}&key={yt_api_key}"
-        elif pattern_used == r'youtube\.com/@([^/\s?]+)':
-            if identifier.startswith('@'):
-                identifier = identifier[1:]
-            search_url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&type=channel&q={identifier}&key={yt_api_key}"
-        else:
-            search_url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&type=channel&q={identifier}&key={yt_api_key}"
-        if 'search_url' in locals():
-            search_res = requests.get(search_url).json()
-            if 'items' in search_res and search_res['items']:
-                return search_res['items'][0]['id']['channelId']
-    except Exception as e:
-        st.error(f"Error resolving channel identifier: {e}")
-    return None
+# Handles and custom URLs map to a fixed channel id, so a day-long cache saves a search call (100 quota units)
+# on every rerun. Failures and misses raise instead of returning None, so only successful lookups are cached
+@st.cache_data(ttl=86400, show_spinner=False)
+def get_channel_id_from_identifier(identifier, url_type):
+    # /user/ names and @handles have exact 1-unit channel lookups; search costs 100 units,
+    # so it is only the fallback when a lookup finds nothing. Most /c/ names were migrated
+    # to a handle of the same name, so they try forHandle first too
+    if url_type == 'user':
+        lookup_params = {'part': 'id', 'forUsername': identifier}
+    elif url_type in ('handle', 'custom'):
+        identifier = identifier.removeprefix('@')
+        lookup_params = {'part': 'id', 'forHandle': f"@{identifier}"}
+    else:
+        lookup_params = None
+    if lookup_params:
+        lookup_res = get_json('channels', lookup_params)
+        if 'items' in lookup_res and lookup_res['items']:
+            return lookup_res['items'][0]['id']
+    search_res = get_json('search', {'part': 'snippet', 'type': 'channel', 'q': identifier})
+    if 'items' in search_res and search_res['items']:
+        return search_res['items'][0]['id']['channelId']
+    raise LookupError(f"no channel found for '{identifier}'")
 
 # ------------------------
 # Data Fetching Functions
 # ------------------------
-def fetch_channel_videos(channel_id, max_videos, api_key):
-    playlist_url = f"https://www.googleapis.com/youtube/v3/channels?part=contentDetails,snippet,statistics&id={channel_id}&key={api_key}"
+MAX_FETCH_WORKERS = 8
+
+# Streamlit re-executes this script on every rerun, so the session lives in cache_resource
+# to keep its keep-alive connections across reruns and sessions
+@st.cache_resource
+def get_http_session(api_key):
+    session = requests.Session()
+    # The key travels in a header rather than the query string, so it never appears in a request URL
+    # and therefore never in an exception message that quotes one
+    session.headers['X-Goog-Api-Key'] = api_key
+    # All calls go to one host; keep enough pooled connections for the detail worker threads
+    # Retry rate limiting and transient server errors with backoff instead of failing the whole fetch.
+    # Once retries run out the last response is handed back, so get_json raises an HTTPError carrying
+    # the API's error body rather than a RetryError that only quotes the request URL
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+    session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=MAX_FETCH_WORKERS, max_retries=retries))
+    # requests already sends Accept-Encoding: gzip, deflate. Google APIs additionally only compress responses
+    # for clients whose User-Agent contains "gzip", so that is the one header worth setting
+    session.headers['User-Agent'] = 'channel-stats (gzip)'
+    return session
+
+http_session = get_http_session(yt_api_key)
+
+YT_API_URL = 'https://www.googleapis.com/youtube/v3/'
+
+# Query values go through params so requests URL-encodes them; none is ever pasted into the URL
+def get_json(endpoint, params):
+    response = http_session.get(YT_API_URL + endpoint, params=params, timeout=10)
+    # Quota and key errors come back as JSON error bodies; raise them so no cached fetch mistakes one for an empty result
+    response.raise_for_status()
+    return response.json()
+
+def describe_request_error(error):
+    # Request exceptions quote the URL they failed on, so only the status and the API's own message are shown
+    response = getattr(error, 'response', None)
+    if response is not None:
+        try:
+            message = response.json()['error']['message']
+        except (ValueError, KeyError, TypeError):
+            message = response.reason
+        return f"HTTP {response.status_code}: {message}"
+    if isinstance(error, requests.RequestException):
+        return f"network error ({type(error).__name__})"
+    return str(error)
+
+# Paging a whole channel is the most expensive fetch, so successful results are also written to an
+# hourly file cache that survives app restarts. Streamlit's own disk persistence ignores ttl and never
+# deletes old entries, so this cache prunes every file from an earlier hour whenever it writes
+CHANNEL_CACHE_DIR = Path('.cache') / 'channels'
+
+def channel_cache_path(channel_id, max_videos, fetched_hour):
+    if not CHANNEL_ID_PATTERN.fullmatch(channel_id):
+        raise ValueError("Invalid Channel ID.")
+    return CHANNEL_CACHE_DIR / f"{channel_id}-{max_videos or 'all'}-{fetched_hour}.json"
+
+def read_channel_cache(path):
     try:
-        playlist_res = requests.get(playlist_url).json()
-        if 'items' not in playlist_res or not playlist_res['items']:
-            st.error("Invalid Channel ID or no uploads found.")
-            return None, None, None
-        channel_info = playlist_res['items'][0]
-        channel_name = channel_info['snippet']['title']
-        channel_stats = channel_info['statistics']
-        uploads_playlist_id = channel_info['contentDetails']['relatedPlaylists']['uploads']
-        videos = []
-        next_page_token = ""
+        return tuple(json.loads(path.read_text()))
+    except (OSError, ValueError):
+        return None
+
+def write_channel_cache(path, result, fetched_hour):
+    # The file cache is only a speed-up, so an unwritable disk must not fail the fetch
+    temp_path = None
+    try:
+        CHANNEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a concurrent reader never sees a half-written file
+        with tempfile.NamedTemporaryFile('w', dir=CHANNEL_CACHE_DIR, suffix='.tmp', delete=False) as f:
+            temp_path = f.name
+            json.dump(result, f)
+        os.replace(temp_path, path)
+        for cached in CHANNEL_CACHE_DIR.glob('*.json'):
+            if not cached.stem.endswith(fetched_hour):
+                cached.unlink(missing_ok=True)
+    except (OSError, TypeError, ValueError):
+        # The prune only matches *.json, so a temp file left behind by a failed write would never be removed
+        if temp_path:
+            Path(temp_path).unlink(missing_ok=True)
+
+# Errors propagate to the caller, so neither cache ever stores a failed fetch
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_channel_videos(channel_id, max_videos, fetched_hour):
+    cache_path = channel_cache_path(channel_id, max_videos, fetched_hour)
+    cached = read_channel_cache(cache_path)
+    if cached is not None:
+        return cached
+    playlist_res = get_json('channels', {
+        'part': 'contentDetails,snippet,statistics',
+        'id': channel_id,
+        'fields': 'items(snippet/title,statistics,contentDetails/relatedPlaylists/uploads)'
+    })
+    if 'items' not in playlist_res or not playlist_res['items']:
+        raise LookupError("Invalid Channel ID or no uploads found.")
+    channel_info = playlist_res['items'][0]
+    channel_name = channel_info['snippet']['title']
+    channel_stats = channel_info['statistics']
+    uploads_playlist_id = channel_info['contentDetails']['relatedPlaylists']['uploads']
+    videos = []
+    next_page_token = ""
+    # Each page's videos.list request starts in a worker while the next playlist page is still loading,
+    # so the detail fetches overlap the sequential nextPageToken walk
+    with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as executor:
+        detail_futures = []
         while (max_videos is None or len(videos) < max_videos) and next_page_token is not None:
-            playlist_items_url = f"https://www.googleapis.com/youtube/v3/playlistItems?part=contentDetails,snippet&maxResults=50&playlistId={uploads_playlist_id}&key={api_key}"
+            playlist_items_params = {
+                'part': 'contentDetails',
+                'maxResults': 50,
+                'playlistId': uploads_playlist_id,
+                'fields': 'items(contentDetails(videoId,videoPublishedAt)),nextPageToken'
+            }
             if next_page_token:
-                playlist_items_url += f"&pageToken={next_page_token}"
-            playlist_items_res = requests.get(playlist_items_url).json()
+                playlist_items_params['pageToken'] = next_page_token
+            playlist_items_res = get_json('playlistItems', playlist_items_params)
+            page_start = len(videos)
             for item in playlist_items_res.get('items', []):
+                # contentDetails alone carries the id and publish time; titles come from videos.list where needed
                 video_id = item['contentDetails']['videoId']
-                title = item['snippet']['title']
-                published_at = item['snippet']['publishedAt']
+                published_at = item['contentDetails'].get('videoPublishedAt', '')
                 videos.append({
                     'videoId': video_id,
-                    'title': title,
                     'publishedAt': published_at
                 })
                 if max_videos is not None and len(videos) >= max_videos:
                     break
+            # Pages hold at most 50 items, which is exactly the videos.list id limit
+            page_ids = [v['videoId'] for v in videos[page_start:]]
+            if page_ids:
+                detail_futures.append(executor.submit(fetch_video_chunk, page_ids))
             next_page_token = playlist_items_res.get('nextPageToken')
-        return videos, channel_name, channel_stats
-    except Exception as e:
-        st.error(f"Error fetching YouTube data: {e}")
-        return None, None, None
-
-def fetch_video_details(video_ids, api_key):
-    if not video_ids:
-        return {}
+    video_details = collect_video_details(detail_futures)
+    result = videos, channel_name, channel_stats, video_details
+    write_channel_cache(cache_path, result, fetched_hour)
+    return result
+
+def fetch_video_chunk(chunk):
+    return get_json('videos', {
+        'part': 'contentDetails,statistics,snippet',
+        'id': ','.join(chunk),
+        'fields': 'items(id,contentDetails/duration,statistics(viewCount,likeCount,commentCount),snippet/publishedAt)'
+    })
+
+def collect_video_details(futures):
+    # Called from fetch_channel_videos on the main thread; the workers only return JSON. A failed chunk
+    # raises, so a channel with missing details is never cached
     all_details = {}
-    video_chunks = [video_ids[i:i+50] for i in range(0, len(video_ids), 50)]
-    for chunk in video_chunks:
-        video_ids_str = ','.join(chunk)
-        details_url = f"https://www.googleapis.com/youtube/v3/videos?part=contentDetails,statistics,snippet&id={video_ids_str}&key={api_key}"
-        try:
-            details_res = requests.get(details_url).json()
-            for item in details_res.get('items', []):
-                duration_str = item['contentDetails']['duration']
-                duration_seconds = parse_duration(duration_str)
-                published_at = item['snippet']['publishedAt']
-                all_details[item['id']] = {
-                    'duration': duration_seconds,
-                    'viewCount': int(item['statistics'].get('viewCount', 0)),
-                    'likeCount': int(item['statistics'].get('likeCount', 0)),
-                    'commentCount': int(item['statistics'].get('commentCount', 0)),
-                    'publishedAt': published_at,
-                    'title': item['snippet']['title'],
-                    'thumbnailUrl': item['snippet'].get('thumbnails', {}).get('medium', {}).get('url', ''),
-                    'isShort': duration_seconds <= 120
-                }
-        except Exception as e:
-            st.warning(f"Error fetching details for some videos: {e}")
+    for future in futures:
+        details_res = future.result()
+        for item in details_res.get('items', []):
+            duration_str = item['contentDetails']['duration']
+            duration_seconds = parse_duration(duration_str)
+            published_at = item['snippet']['publishedAt']
+            all_details[item['id']] = {
+                'duration': duration_seconds,
+                'viewCount': int(item['statistics'].get('viewCount', 0)),
+                'likeCount': int(item['statistics'].get('likeCount', 0)),
+                'commentCount': int(item['statistics'].get('commentCount', 0)),
+                'publishedAt': published_at,
+                'isShort': duration_seconds <= 120
+            }
     return all_details
 
+# ISO 8601 durations as returned by the API, e.g. PT1H2M3S, or P1DT2H for long livestreams
+DURATION_PATTERN = re.compile(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?')
+
+# Durations repeat heavily across a channel (Shorts in particular), so parsed strings are memoized
+@lru_cache(maxsize=4096)
 def parse_duration(duration_str):
-    hours = re.search(r'(\d+)H', duration_str)
-    minutes = re.search(r'(\d+)M', duration_str)
-    seconds = re.search(r'(\d+)S', duration_str)
-    total_seconds = 0
-    if hours:
-        total_seconds += int(hours.group(1)) * 3600
-    if minutes:
-        total_seconds += int(minutes.group(1)) * 60
-    if seconds:
-        total_seconds += int(seconds.group(1))
-    return total_seconds
-
-def fetch_single_video(video_id, api_key):
-    video_url = f"https://www.googleapis.com/youtube/v3/videos?part=snippet,statistics,contentDetails&id={video_id}&key={api_key}"
-    try:
-        response = requests.get(video_url).json()
-        if 'items' not in response or not response['items']:
-            return None
-        video_data = response['items'][0]
-        duration_str = video_data['contentDetails']['duration']
-        duration_seconds = parse_duration(duration_str)
-        return {
-            'videoId': video_id,
-            'title': video_data['snippet']['title'],
-            'channelId': video_data['snippet']['channelId'],
-            'channelTitle': video_data['snippet']['channelTitle'],
-            'publishedAt': video_data['snippet']['publishedAt'],
-            'thumbnailUrl': video_data['snippet'].get('thumbnails', {}).get('medium', {}).get('url', ''),
-            'viewCount': int(video_data['statistics'].get('viewCount', 0)),
-            'likeCount': int(video_data['statistics'].get('likeCount', 0)),
-            'commentCount': int(video_data['statistics'].get('commentCount', 0)),
-            'duration': duration_seconds,
-            'isShort': duration_seconds <= 120
-        }
-    except Exception as e:
-        st.error(f"Error fetching video details: {e}")
+    match = DURATION_PATTERN.fullmatch(duration_str)
+    if not match:
+        return 0
+    days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return days * 86400 + hours * 3600 + minutes * 60 + seconds
+
+@lru_cache(maxsize=256)
+def parse_published_date(published_at):
+    return datetime.datetime.fromisoformat(published_at.replace('Z', '+00:00')).date()
+
+# Errors propagate to the caller so a failed request is not cached as a missing video for an hour
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_single_video(video_id):
+    response = get_json('videos', {
+        'part': 'snippet,statistics,contentDetails',
+        'id': video_id,
+        'fields': 'items(snippet(title,channelId,channelTitle,publishedAt,thumbnails/medium/url),statistics(viewCount,likeCount,commentCount),contentDetails/duration)'
+    })
+    if 'items' not in response or not response['items']:
         return None
+    video_data = response['items'][0]
+    duration_str = video_data['contentDetails']['duration']
+    duration_seconds = parse_duration(duration_str)
+    return {
+        'videoId': video_id,
+        'title': video_data['snippet']['title'],
+        'channelId': video_data['snippet']['channelId'],
+        'channelTitle': video_data['snippet']['channelTitle'],
+        'publishedAt': video_data['snippet']['publishedAt'],
+        'thumbnailUrl': video_data['snippet'].get('thumbnails', {}).get('medium', {}).get('url', ''),
+        'viewCount': int(video_data['statistics'].get('viewCount', 0)),
+        'likeCount': int(video_data['statistics'].get('likeCount', 0)),
+        'commentCount': int(video_data['statistics'].get('commentCount', 0)),
+        'duration': duration_seconds,
+        'isShort': duration_seconds <= 120
+    }
 
 # ------------------------
 # Benchmark & Simulation Functions
 # ------------------------
-def generate_historical_data(video_details, max_days, is_short=False):
-    today = datetime.datetime.now().date()
-    all_video_data = []
-    for video_id, details in video_details.items():
-        if is_short is not None and details['isShort'] != is_short:
-            continue
-        try:
-            publish_date = datetime.datetime.fromisoformat(details['publishedAt'].replace('Z', '+00:00')).date()
-            video_age_days = (today - publish_date).days
-        except:
-            continue
-        if video_age_days < 3:
-            continue
-        days_to_generate = video_age_days if max_days > video_age_days else max_days
-        total_views = details['viewCount']
-        video_data = generate_view_trajectory(video_id, days_to_generate, total_views, details['isShort'])
-        all_video_data.extend(video_data)
-    if not all_video_data:
-        return pd.DataFrame()
-    return pd.DataFrame(all_video_data)
-
-def generate_view_trajectory(video_id, days, total_views, is_short):
-    data = []
-    if is_short:
-        trajectory = [total_views * (1 - np.exp(-5 * ((i+1)/days)**1.5)) for i in range(days)]
-    else:
-        k = 10
-        trajectory = [total_views * (1 / (1 + np.exp(-k * ((i+1)/days - 0.35)))) for i in range(days)]
-    scaling_factor = total_views / trajectory[-1] if trajectory[-1] > 0 else 1
-    trajectory = [v * scaling_factor for v in trajectory]
+@st.cache_data(ttl=3600, show_spinner=False)
+def generate_historical_data(video_details, max_days, is_short=False, seed=0):
+    # A fixed seed keeps the simulated benchmark stable for a given cache key
+    rng = np.random.default_rng(seed)
+    today = date.today()
+    candidates = [(video_id, details) for video_id, details in video_details.items()
+                  if is_short is None or details['isShort'] == is_short]
+    if not candidates:
+        return np.empty((0, 0))
+    # Parse every publish date in one pass; unparseable dates become NaT and are dropped with the too-young videos
+    published = pd.to_datetime([details['publishedAt'] for _, details in candidates], utc=True, errors='coerce', format='ISO8601')
+    video_age_days = (pd.Timestamp(today) - published.tz_convert(None).normalize()).days.to_numpy(dtype=float, na_value=np.nan)
+    keep = video_age_days >= 3
+    if not keep.any():
+        return np.empty((0, 0))
+    video_ids = [video_id for (video_id, _), kept in zip(candidates, keep) if kept]
+    days = np.minimum(video_age_days[keep], max_days).astype(int)
+    total_views = [video_details[video_id]['viewCount'] for video_id in video_ids]
+    shorts = [video_details[video_id]['isShort'] for video_id in video_ids]
+    max_len = days.max()
+    # Pad every video out to the oldest one; cells past a video's age stay NaN so the
+    # benchmark percentiles only count videos that have reached that day
+    valid = np.arange(max_len) < days[:, None]
+    noise = np.zeros(valid.shape)
+    noise[valid] = rng.standard_normal(days.sum())
+    cumulative = generate_view_trajectories(days, np.array(total_views, dtype=float), np.array(shorts), noise)
+    return np.where(valid, np.trunc(cumulative), np.nan)
+
+def generate_view_trajectories(days, total_views, is_short, noise):
+    # Rows are videos and columns are days since upload
+    day_index = np.arange(noise.shape[1])
+    t = (day_index + 1) / days[:, None]
+    short_curve = 1 - np.exp(-5 * t**1.5)
+    k = 10
+    long_curve = 1 / (1 + np.exp(-k * (t - 0.35)))
+    trajectory = total_views[:, None] * np.where(is_short[:, None], short_curve, long_curve)
+    final_views = trajectory[np.arange(len(days)), days - 1]
+    scaling_factor = np.divide(total_views, final_views, out=np.ones_like(final_views), where=final_views > 0)
+    trajectory *= scaling_factor[:, None]
     noise_factor = 0.05
-    for i in range(days):
-        noise = np.random.normal(0, noise_factor * total_views)
-        if i == 0:
-            noisy_value = max(100, trajectory[i] + noise)
-        else:
-            noisy_value = max(trajectory[i-1] + 10, trajectory[i] + noise)
-        trajectory[i] = noisy_value
-    daily_views = [trajectory[0]]
-    for i in range(1, days):
-        daily_views.append(trajectory[i] - trajectory[i-1])
-    for day in range(days):
-        data.append({
-            'videoId': video_id,
-            'day': day,
-            'daily_views': int(daily_views[day]),
-            'cumulative_views': int(trajectory[day])
-        })
-    return data
-
-def calculate_benchmark(df, band_percentage):
-    lower_q = (100 - band_percentage) / 200
-    upper_q = 1 - (100 - band_percentage) / 200
-    summary = df.groupby('day')['cumulative_views'].agg([
-        ('lower_band', lambda x: x.quantile(lower_q)),
-        ('upper_band', lambda x: x.quantile(upper_q)),
-        ('median', 'median'),
-        ('mean', 'mean'),
-        ('count', 'count')
-    ]).reset_index()
+    noisy = trajectory + noise * (noise_factor * total_views)[:, None]
+    noisy[:, 0] = np.maximum(100, noisy[:, 0])
+    # Each day gains at least 10 views: y[i] = max(y[i-1] + 10, x[i]) is a running max of x - 10*i
+    min_gain = 10 * day_index
+    return np.maximum.accumulate(noisy - min_gain, axis=1) + min_gain
+
+@st.cache_data(show_spinner=False)
+def calculate_benchmark(views, band_percentage):
+    lower_pct = (100 - band_percentage) / 2
+    upper_pct = 100 - lower_pct
+    # One row per video, one column per day; videos younger than max_days leave trailing NaNs
+    lower_band, median, upper_band = np.nanpercentile(views, [lower_pct, 50, upper_pct], axis=0)
+    summary = pd.DataFrame({
+        # Day and count are small integers; the bands stay float64 to keep view counts exact
+        'day': np.arange(views.shape[1], dtype=np.int32),
+        'lower_band': lower_band,
+        'upper_band': upper_band,
+        'median': median,
+        'mean': np.nanmean(views, axis=0),
+        'count': np.count_nonzero(~np.isnan(views), axis=0).astype(np.int32)
+    })
     return summary
 
-def simulate_video_performance(video_data, benchmark_data, max_days, approach="full"):
+# Reads today's date for the video age, so it expires like the benchmark data it is compared against
+@st.cache_data(ttl=3600, show_spinner=False)
+def simulate_video_performance(video_data, benchmark_data, max_days, approach="full", seed=0):
     try:
-        published_at = datetime.datetime.fromisoformat(video_data['publishedAt'].replace('Z', '+00:00')).date()
-        current_date = datetime.datetime.now().date()
+        published_at = parse_published_date(video_data['publishedAt'])
+        current_date = date.today()
         days_since_publish = (current_date - published_at).days
     except:
         days_since_publish = 0
@@ -332,49 +460,68 @@ def simulate_video_performance(video_data, benchmark_data, max_days, approach="f
         days_to_project = max(days_since_publish, max_days)
     else:
         days_to_project = days_since_publish
-    data = []
-    if days_since_publish < len(benchmark_data):
-        benchmark_views_at_current_age = benchmark_data.loc[days_since_publish, 'median']
+    median = benchmark_data['median'].to_numpy()
+    if days_since_publish < len(median):
+        benchmark_views_at_current_age = median[days_since_publish]
         performance_ratio = current_views / benchmark_views_at_current_age if benchmark_views_at_current_age > 0 else 1.0
     else:
         performance_ratio = 1.0
-    for day in range(days_since_publish + 1):
-        if day >= len(benchmark_data):
-            break
-        if day == days_since_publish:
-            cumulative_views = current_views
-        else:
-            benchmark_views = benchmark_data.loc[day, 'median']
-            cumulative_views = benchmark_views * performance_ratio
-        cumulative_views = int(cumulative_views * np.random.uniform(0.98, 1.02))
-        if day == 0:
-            daily_views = cumulative_views
-        else:
-            prev_cumulative = data[-1]['cumulative_views']
-            daily_views = max(0, cumulative_views - prev_cumulative)
-        data.append({
-            'day': day,
-            'daily_views': daily_views,
-            'cumulative_views': cumulative_views,
-            'projected': False
-        })
-    if days_to_project > days_since_publish and approach == "full":
-        for day in range(days_since_publish + 1, days_to_project + 1):
-            if day >= len(benchmark_data):
-                break
-            benchmark_views = benchmark_data.loc[day, 'median']
-            projected_views = int(benchmark_views * performance_ratio)
-            prev_cumulative = data[-1]['cumulative_views']
-            daily_views = max(0, projected_views - prev_cumulative)
-            data.append({
-                'day': day,
-                'daily_views': daily_views,
-                'cumulative_views': projected_views,
-                'projected': True
-            })
-    return pd.DataFrame(data)
-
-def create_comparison_chart(benchmark_data, video_data, video_title, video_type_str, theme_colors, approach_mode="full"):
+    # Every day follows the benchmark median scaled by the video's performance so far, pinned to the
+    # real view count on its current day; only the actual days get the +/-2% jitter, not the projection
+    num_days = min(days_to_project + 1, len(median))
+    actual_days = min(days_since_publish + 1, num_days)
+    cumulative_views = median[:num_days] * performance_ratio
+    if days_since_publish < num_days:
+        cumulative_views[days_since_publish] = current_views
+    jitter = np.random.default_rng(seed).uniform(0.98, 1.02, size=days_since_publish + 1)
+    cumulative_views[:actual_days] *= jitter[:actual_days]
+    cumulative_views = cumulative_views.astype(np.int64)
+    # Narrower columns halve what the table preview and the exports serialize; int64 only when a count needs it
+    view_dtype = np.int32 if cumulative_views.max(initial=0) <= np.iinfo(np.int32).max else np.int64
+    day = np.arange(num_days, dtype=np.int32)
+    return pd.DataFrame({
+        'day': day,
+        'daily_views': np.maximum(np.diff(cumulative_views, prepend=0), 0).astype(view_dtype),
+        'cumulative_views': cumulative_views.astype(view_dtype),
+        'projected': day > days_since_publish
+    })
+
+def lttb_indices(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: keep the first and last point, and from each bucket in between
+    # the point forming the largest triangle with the previous pick and the next bucket's mean
+    n = len(x)
+    bucket_size = (n - 2) / (n_out - 2)
+    bucket_edges = (np.arange(n_out - 1) * bucket_size).astype(int) + 1
+    bucket_edges[-1] = n - 1
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = prev = 0
+    for i in range(n_out - 2):
+        start, end = bucket_edges[i], bucket_edges[i + 1]
+        next_end = bucket_edges[i + 2] if i + 2 < n_out - 1 else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        area = np.abs((x[prev] - next_x) * (y[start:end] - y[prev]) - (x[prev] - x[start:end]) * (next_y - y[prev]))
+        prev = start + int(area.argmax())
+        selected[i + 1] = prev
+    selected[-1] = n - 1
+    return selected
+
+def downsample_for_chart(df, max_points, value_column):
+    if len(df) <= max_points or max_points < 3:
+        return df
+    x = df['day'].to_numpy(dtype=float)
+    y = df[value_column].to_numpy(dtype=float)
+    return df.iloc[lttb_indices(x, y, max_points)]
+
+# The traces don't depend on the theme; each one names its colour role in `meta`
+# so a theme toggle only recolours the cached figure instead of rebuilding it
+@st.cache_data(show_spinner=False)
+def build_comparison_figure(benchmark_data, video_data, video_title, video_type_str, approach_mode="full", max_points=500):
+    # WebGL only pays off on long series, so decide on the full lengths before the lines are thinned to
+    # max_points; the filled band stays SVG, where tonexty fills are reliable
+    line_trace = go.Scattergl if max(len(benchmark_data), len(video_data)) > 1000 else go.Scatter
+    # The bands share the median's x positions so the tonexty fill between them lines up
+    benchmark_data = downsample_for_chart(benchmark_data, max_points, 'median')
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         x=benchmark_data['day'], 
@@ -389,50 +536,56 @@ def create_comparison_chart(benchmark_data, video_data, video_title, video_type_
         y=benchmark_data['lower_band'],
         name=f'Typical Performance Range ({video_type_str})',
         fill='tonexty',
-        fillcolor=theme_colors['gray_band_color'],
         line=dict(width=0),
+        meta='gray_band_color',
         mode='lines'
     ))
-    fig.add_trace(go.Scatter(
+    fig.add_trace(line_trace(
         x=benchmark_data['day'], 
         y=benchmark_data['median'],
         name=f'Typical Performance ({video_type_str})',
-        line=dict(color=theme_colors['benchmark_color'], width=2, dash='dash'),
+        line=dict(width=2, dash='dash'),
+        meta='benchmark_color',
         mode='lines'
     ))
     # For Approach 3, add an extra trace for the average of the band
     if approach_mode == "extra":
         avg_band = (benchmark_data['lower_band'] + benchmark_data['upper_band']) / 2
-        fig.add_trace(go.Scatter(
+        fig.add_trace(line_trace(
             x=benchmark_data['day'],
             y=avg_band,
             name=f'Average of Typical Range ({video_type_str})',
-            line=dict(color=theme_colors['primary_color'], width=2, dash='dot'),
+            line=dict(width=2, dash='dot'),
+            meta='primary_color',
             mode='lines'
         ))
         # And add a new trace for the channel's cumulative mean views
-        fig.add_trace(go.Scatter(
+        fig.add_trace(line_trace(
             x=benchmark_data['day'],
             y=benchmark_data['mean'],
             name=f'Channel Cumulative Mean ({video_type_str})',
-            line=dict(color=theme_colors['primary_color'], width=2, dash='longdash'),
+            line=dict(width=2, dash='longdash'),
+            meta='primary_color',
             mode='lines'
         ))
-    actual_data = video_data[video_data['projected'] == False]
-    projected_data = video_data[video_data['projected'] == True]
-    fig.add_trace(go.Scatter(
+    projected_mask = video_data['projected'].to_numpy(dtype=bool)
+    actual_data = downsample_for_chart(video_data[~projected_mask], max_points, 'cumulative_views')
+    projected_data = downsample_for_chart(video_data[projected_mask], max_points, 'cumulative_views')
+    fig.add_trace(line_trace(
         x=actual_data['day'], 
         y=actual_data['cumulative_views'],
         name=f'"{video_title}" (Actual)',
-        line=dict(color=theme_colors['line_color'], width=3),
+        line=dict(width=3),
+        meta='line_color',
         mode='lines'
     ))
     if not projected_data.empty:
-        fig.add_trace(go.Scatter(
+        fig.add_trace(line_trace(
             x=projected_data['day'], 
             y=projected_data['cumulative_views'],
             name=f'"{video_title}" (Projected)',
-            line=dict(color=theme_colors['line_color'], width=3, dash='dot'),
+            line=dict(width=3, dash='dot'),
+            meta='line_color',
             mode='lines'
         ))
     fig.update_layout(
@@ -447,13 +600,222 @@ def create_comparison_chart(benchmark_data, video_data, video_title, video_type_
             y=1.02,
             xanchor="right",
             x=1
-        ),
+        )
+    )
+    return fig
+
+def create_comparison_chart(benchmark_data, video_data, video_title, video_type_str, theme_colors, approach_mode="full", max_points=500):
+    fig = build_comparison_figure(benchmark_data, video_data, video_title, video_type_str, approach_mode, max_points)
+    for trace in fig.data:
+        if trace.meta == 'gray_band_color':
+            trace.fillcolor = theme_colors['gray_band_color']
+        elif trace.meta:
+            trace.line.color = theme_colors[trace.meta]
+    fig.update_layout(
         plot_bgcolor=theme_colors['background_color'],
         paper_bgcolor=theme_colors['background_color'],
         font_color=theme_colors['text_color']
     )
     return fig
 
+# ------------------------
+# Display Functions
+# ------------------------
+def render_metric_cards(cards):
+    # One markdown element for the whole row instead of one per column
+    cards_html = "".join(f"<div class='metric-card'><b>{title}</b><br>{body}</div>" for title, body in cards)
+    st.markdown(f"<div class='metric-row'>{cards_html}</div>", unsafe_allow_html=True)
+
+# Thousands separators are applied by the table widget in the browser, not per cell in Python.
+# step=1 sets the display precision to zero digits, so the fractional band columns show whole views too
+TABLE_COLUMN_CONFIG = {
+    column: st.column_config.NumberColumn(format="localized", step=1)
+    for column in ('lower_band', 'upper_band', 'median', 'mean', 'daily_views', 'cumulative_views')
+}
+
+def render_table_preview(df, key, max_rows=500):
+    # Only one page of rows is sent to the browser; the download buttons below carry the full frame
+    if len(df) <= max_rows:
+        st.dataframe(df, hide_index=True, column_config=TABLE_COLUMN_CONFIG)
+        return
+    page_count = -(-len(df) // max_rows)
+    page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1, key=key)
+    start = (page - 1) * max_rows
+    st.dataframe(df.iloc[start:start + max_rows], hide_index=True, column_config=TABLE_COLUMN_CONFIG)
+    st.caption(f"Showing rows {start + 1:,}-{min(start + max_rows, len(df)):,} of {len(df):,}. Download the data for the full table.")
+
+def describe_performance(view_count, benchmark_lower, benchmark_median, benchmark_upper, percentile_range):
+    if view_count >= benchmark_upper:
+        percentile = f"Top {100 - percentile_range}%"
+        performance_color = "green"
+    elif view_count <= benchmark_lower:
+        percentile = f"Bottom {percentile_range}%"
+        performance_color = "red"
+    else:
+        range_width = benchmark_upper - benchmark_lower
+        if range_width > 0:
+            position_in_range = (view_count - benchmark_lower) / range_width
+            estimated_percentile = percentile_range + position_in_range * (100 - 2 * percentile_range)
+            percentile = f"~{estimated_percentile:.0f}th percentile"
+            performance_color = "orange"
+        else:
+            percentile = "Average"
+            performance_color = "gray"
+    if benchmark_median > 0:
+        vs_benchmark_pct = ((view_count / benchmark_median) - 1) * 100
+        vs_benchmark_str = f"{vs_benchmark_pct:+.1f}% vs typical"
+    else:
+        vs_benchmark_str = "N/A"
+    return percentile, performance_color, vs_benchmark_str
+
+# A fragment, so the table picker and pager inside it rerun only this section instead of the whole script
+@st.fragment
+def render_performance_analysis(video_details, video_id, video_age, channel_name, video_type_str,
+                                benchmark_stats, video_performance, avg_vph, avg_engagement,
+                                percentile_range, approach_mode, show_data_tables, download_format):
+    st.markdown("<div class='subheader'>Performance Analysis</div>", unsafe_allow_html=True)
+    day_index = int(np.clip(video_age, 0, len(benchmark_stats) - 1))
+    # Three positional cell reads; the stats frame has one row per day, so the day is the row position
+    benchmark_median, benchmark_lower, benchmark_upper = (
+        benchmark_stats.iat[day_index, benchmark_stats.columns.get_loc(column)]
+        for column in ('median', 'lower_band', 'upper_band'))
+    if approach_mode == "extra":
+        benchmark_avg = (benchmark_lower + benchmark_upper) / 2
+    percentile, performance_color, vs_benchmark_str = describe_performance(
+        video_details['viewCount'], float(benchmark_lower), float(benchmark_median), float(benchmark_upper), percentile_range)
+    # Formatted once and shared by both card layouts
+    views_str = f"{video_details['viewCount']:,}"
+    median_str = f"{int(benchmark_median):,}"
+    performance_html = f"<span style='color:{performance_color}'>{vs_benchmark_str}</span>"
+    ranking_html = f"<span style='color:{performance_color}'>{percentile}</span>"
+    if approach_mode == "extra":
+        render_metric_cards([
+            ("Current Views", views_str),
+            ("Typical Views", median_str),
+            ("Channel Average", f"{int(benchmark_avg):,}"),
+            ("Performance", performance_html),
+            ("Ranking", ranking_html)
+        ])
+        channel_stats_cols = st.columns(2)
+        with channel_stats_cols[0]:
+            st.metric("Channel VPH", f"{avg_vph:,.1f}")
+        with channel_stats_cols[1]:
+            st.metric("Channel Engagement Rate", f"{avg_engagement:,.1f}%")
+    else:
+        render_metric_cards([
+            ("Current Views", views_str),
+            ("Typical Views at this age", median_str),
+            ("Performance", performance_html),
+            ("Ranking", ranking_html)
+        ])
+    if show_data_tables:
+        st.markdown("<div class='subheader'>Data Tables</div>", unsafe_allow_html=True)
+        # A radio rather than tabs: tabs run every tab's body, so both tables would be serialized on each rerun
+        table_choice = st.radio("Table", ["Benchmark Data", "Video Performance Data"], horizontal=True,
+                                label_visibility="collapsed", key='data-table-choice')
+        if table_choice == "Benchmark Data":
+            st.write("### Typical Performance Benchmark")
+            render_table_preview(benchmark_stats, key='benchmark-table-page')
+        else:
+            st.write("### Video Performance Data")
+            render_table_preview(video_performance, key='performance-table-page')
+    st.markdown("<div class='subheader'>Download Data</div>", unsafe_allow_html=True)
+    # ?debug in the URL shows how long each download took to encode; a cache hit reads as well under a millisecond
+    encode_timings = get_encode_timings()
+    if 'debug' in st.query_params and encode_timings:
+        st.caption("Encode times: " + ", ".join(f"{name} {ms:.1f} ms" for name, ms in encode_timings.items()))
+    # The data arguments are callables, so a file is only encoded when its button is clicked, and
+    # on_click="ignore" keeps a click from rerunning anything at all
+    channel_slug = channel_name.replace(' ', '_')
+    type_slug = video_type_str.replace(' ', '_')
+    if download_format == 'zip':
+        # One button and one deflated payload carrying both tables as CSV
+        st.download_button(
+            "Download All Data",
+            timed_download(encode_timings, f"{video_id}.zip", lambda: dataframes_to_zip({
+                f"{channel_slug}_benchmark_{type_slug}.csv": benchmark_stats,
+                f"{video_id}_performance_data.csv": video_performance
+            })),
+            f"{channel_slug}_{video_id}_data.zip",
+            "application/zip",
+            key='download-all',
+            on_click="ignore"
+        )
+    else:
+        encode, mime = DOWNLOAD_FORMATS[download_format]
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                "Download Benchmark Data", 
+                timed_download(encode_timings, f"benchmark.{download_format}", lambda: encode(benchmark_stats)), 
+                f"{channel_slug}_benchmark_{type_slug}.{download_format}",
+                mime,
+                key='download-benchmark',
+                on_click="ignore"
+            )
+        with col2:
+            st.download_button(
+                "Download Video Performance Data", 
+                timed_download(encode_timings, f"performance.{download_format}", lambda: encode(video_performance)),
+                f"{video_id}_performance_data.{download_format}",
+                mime,
+                key='download-performance',
+                on_click="ignore"
+            )
+
+# ------------------------
+# Export Functions
+# ------------------------
+@st.cache_data(show_spinner=False)
+def dataframe_to_csv(df):
+    # Write straight into a bytes buffer instead of building a str and re-encoding it
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False, encoding='utf-8')
+    return buffer.getvalue()
+
+@st.cache_data(show_spinner=False)
+def dataframe_to_csv_gz(df):
+    # Level 1 keeps most of the size win at a fraction of the default level's CPU cost
+    return gzip.compress(dataframe_to_csv(df), compresslevel=1)
+
+@st.cache_data(show_spinner=False)
+def dataframe_to_parquet(df):
+    # pyarrow ships with Streamlit, so Parquet needs no extra dependency
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False, compression='zstd')
+    return buffer.getvalue()
+
+@st.cache_data(show_spinner=False)
+def dataframes_to_zip(frames):
+    # frames maps archive member names to DataFrames; level 1 deflate for the same reason as the gzip export
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        for name, df in frames.items():
+            archive.writestr(name, dataframe_to_csv(df))
+    return buffer.getvalue()
+
+def get_encode_timings():
+    # Latest encode time in ms per download file for this session only; the dict lives in session state
+    # so the debug caption on a later rerun can report it
+    return st.session_state.setdefault('encode_timings', {})
+
+def timed_download(timings, name, build):
+    # Download callables run on their own thread after the click, where st.session_state is not available,
+    # so they write into the session's own dict passed in from the render; the time shows on the next render
+    def build_and_time():
+        start = time.perf_counter()
+        data = build()
+        timings[name] = (time.perf_counter() - start) * 1000
+        return data
+    return build_and_time
+
+# Download format -> (encoder, MIME type); the format key doubles as the file extension
+DOWNLOAD_FORMATS = {
+    'csv': (dataframe_to_csv, "text/csv"),
+    'csv.gz': (dataframe_to_csv_gz, "application/gzip"),
+    'parquet': (dataframe_to_parquet, "application/vnd.apache.parquet")
+}
+
 # ------------------------
 # Sidebar Settings
 # ------------------------
@@ -490,6 +852,14 @@ with st.sidebar:
         step=1,
         help="Number of days to analyze after video upload (set high for lifetime)"
     )
+    chart_max_points = st.slider(
+        "Chart resolution (max points per line)",
+        min_value=100,
+        max_value=3650,
+        value=500,
+        step=50,
+        help="Long analyses are thinned to this many points per line before plotting"
+    )
     include_all_videos = st.checkbox("Include all videos", value=False)
     if include_all_videos:
         num_videos = None
@@ -511,6 +881,13 @@ with st.sidebar:
         help="Middle percentage range for typical performance (e.g., 50 = 25th to 75th percentile, 80 = 10th to 90th percentile)"
     )
     show_data_tables = st.checkbox("Show data tables", value=False)
+    download_format = st.radio(
+        "Download format",
+        options=["csv", "csv.gz", "parquet", "zip"],
+        format_func={"csv": "CSV", "csv.gz": "Gzipped CSV (smaller)", "parquet": "Parquet",
+                     "zip": "ZIP of both tables"}.get,
+        horizontal=True
+    )
 
 # ------------------------
 # Main Input Section
@@ -524,7 +901,12 @@ with col2:
 # ------------------------
 # Main Process Flow
 # ------------------------
+# The button is only True on the run right after the click, so remember what was submitted and keep
+# rendering it on later reruns (downloads, sidebar tweaks); every fetch behind it is cached
 if st.button("Generate Benchmark", type="primary") and channel_url and video_url:
+    st.session_state['benchmark_request'] = (channel_url, video_url)
+if 'benchmark_request' in st.session_state:
+    channel_url, video_url = st.session_state['benchmark_request']
     channel_id = extract_channel_id(channel_url)
     video_id = extract_video_id(video_url)
     if not channel_id:
@@ -534,20 +916,29 @@ if st.button("Generate Benchmark", type="primary") and channel_url and video_url
         st.error("Could not extract a valid video ID from the provided URL. Please check the URL format.")
         st.stop()
     with st.spinner("Fetching video details..."):
-        video_details = fetch_single_video(video_id, yt_api_key)
+        try:
+            video_details = fetch_single_video(video_id)
+        except Exception as e:
+            st.error(f"Error fetching video details: {describe_request_error(e)}")
+            st.stop()
         if not video_details:
             st.error("Failed to fetch video details. Please check the video URL.")
             st.stop()
         if video_details['channelId'] != channel_id:
             st.warning(f"The video belongs to channel '{video_details['channelTitle']}', which is different from the channel URL you provided. Analysis may not be accurate.")
-        published_date = datetime.datetime.fromisoformat(video_details['publishedAt'].replace('Z', '+00:00')).date()
-        video_age = (datetime.datetime.now().date() - published_date).days
+        published_date = parse_published_date(video_details['publishedAt'])
+        video_age = (date.today() - published_date).days
         if approach_mode in ["current", "extra"]:
             analysis_days = video_age if video_age >= 2 else 2
         else:
             analysis_days = max_days
     with st.spinner("Fetching channel videos for benchmark..."):
-        channel_videos, channel_name, channel_stats = fetch_channel_videos(channel_id, num_videos, yt_api_key)
+        try:
+            channel_videos, channel_name, channel_stats, channel_video_details = fetch_channel_videos(
+                channel_id, num_videos, datetime.datetime.now().strftime('%Y%m%d%H'))
+        except Exception as e:
+            st.error(f"Error fetching YouTube data: {describe_request_error(e)}")
+            channel_videos = None
         if not channel_videos:
             st.error("Failed to fetch channel videos. Please check the channel URL.")
             st.stop()
@@ -571,22 +962,18 @@ if st.button("Generate Benchmark", type="primary") and channel_url and video_url
             with metrics_cols[2]:
                 st.metric("Comments", f"{video_details['commentCount']:,}")
     with st.spinner("Processing benchmark data..."):
-        video_ids = [v['videoId'] for v in channel_videos]
-        detailed_videos = fetch_video_details(video_ids, yt_api_key)
-        # Remove the target video from the channel benchmark
-        if video_id in detailed_videos:
-            del detailed_videos[video_id]
-        # Compute additional channel stats from benchmark videos
-        vph_list = []
-        engagement_list = []
-        for vid, details in detailed_videos.items():
-            if details['duration'] > 0:
-                duration_hours = details['duration'] / 3600
-                vph_list.append(details['viewCount'] / duration_hours)
-            if details['viewCount'] > 0:
-                engagement_list.append((details['likeCount'] + details['commentCount']) / details['viewCount'] * 100)
-        avg_vph = np.mean(vph_list) if vph_list else 0
-        avg_engagement = np.mean(engagement_list) if engagement_list else 0
+        # The target video is analysed on its own, so it stays out of the channel benchmark
+        detailed_videos = {vid: details for vid, details in channel_video_details.items() if vid != video_id}
+        # Compute additional channel stats from benchmark videos, one array per field
+        def detail_array(field, dtype=np.int64):
+            return np.fromiter((details[field] for details in detailed_videos.values()), dtype=dtype, count=len(detailed_videos))
+        durations = detail_array('duration')
+        view_counts = detail_array('viewCount')
+        interactions = detail_array('likeCount') + detail_array('commentCount')
+        has_duration = durations > 0
+        has_views = view_counts > 0
+        avg_vph = np.mean(view_counts[has_duration] / (durations[has_duration] / 3600)) if has_duration.any() else 0
+        avg_engagement = np.mean(interactions[has_views] / view_counts[has_views] * 100) if has_views.any() else 0
 
         if video_type == "auto":
             is_short_filter = video_details['isShort']
@@ -600,7 +987,7 @@ if st.button("Generate Benchmark", type="primary") and channel_url and video_url
         else:
             is_short_filter = None
             video_type_str = "All Videos"
-        shorts_count = sum(1 for _, details in detailed_videos.items() if details['isShort'])
+        shorts_count = int(detail_array('isShort', dtype=bool).sum())
         longform_count = len(detailed_videos) - shorts_count
         if is_short_filter is True and shorts_count < 5:
             st.warning(f"Not enough Shorts in this channel (found {shorts_count}). Using all videos instead.")
@@ -611,101 +998,20 @@ if st.button("Generate Benchmark", type="primary") and channel_url and video_url
             is_short_filter = None
             video_type_str = "All Videos"
         st.info(f"Building benchmark from {len(detailed_videos)} videos: {shorts_count} shorts and {longform_count} long-form videos")
-        benchmark_df = generate_historical_data(detailed_videos, analysis_days, is_short_filter)
-        if benchmark_df.empty:
+        benchmark_views = generate_historical_data(detailed_videos, analysis_days, is_short_filter)
+        if benchmark_views.size == 0:
             st.error("Not enough data to create a benchmark. Try including more videos or changing the video type filter.")
             st.stop()
-        benchmark_stats = calculate_benchmark(benchmark_df, percentile_range)
+        benchmark_stats = calculate_benchmark(benchmark_views, percentile_range)
         if approach_mode == "extra":
             benchmark_stats['avg_band'] = (benchmark_stats['lower_band'] + benchmark_stats['upper_band']) / 2
         sim_approach = "full" if approach_mode == "full" else "current"
         video_performance = simulate_video_performance(video_details, benchmark_stats, analysis_days, approach=sim_approach)
         fig = create_comparison_chart(benchmark_stats, video_performance, 
                                       video_details['title'][:40] + "..." if len(video_details['title']) > 40 else video_details['title'], 
-                                      video_type_str, theme_colors, approach_mode=approach_mode)
+                                      video_type_str, theme_colors, approach_mode=approach_mode,
+                                      max_points=chart_max_points)
         st.plotly_chart(fig, use_container_width=True)
-        
-        st.markdown("<div class='subheader'>Performance Analysis</div>", unsafe_allow_html=True)
-        day_index = min(video_age, len(benchmark_stats) - 1)
-        if day_index < 0:
-            day_index = 0
-        benchmark_median = benchmark_stats.loc[day_index, 'median']
-        benchmark_lower = benchmark_stats.loc[day_index, 'lower_band']
-        benchmark_upper = benchmark_stats.loc[day_index, 'upper_band']
-        if approach_mode == "extra":
-            benchmark_avg = (benchmark_lower + benchmark_upper) / 2
-        if video_details['viewCount'] >= benchmark_upper:
-            percentile = f"Top {100 - percentile_range}%"
-            performance_color = "green"
-        elif video_details['viewCount'] <= benchmark_lower:
-            percentile = f"Bottom {percentile_range}%"
-            performance_color = "red"
-        else:
-            range_width = benchmark_upper - benchmark_lower
-            if range_width > 0:
-                position_in_range = (video_details['viewCount'] - benchmark_lower) / range_width
-                estimated_percentile = percentile_range + position_in_range * (100 - 2 * percentile_range)
-                percentile = f"~{estimated_percentile:.0f}th percentile"
-                performance_color = "orange"
-            else:
-                percentile = "Average"
-                performance_color = "gray"
-        if benchmark_median > 0:
-            vs_benchmark_pct = ((video_details['viewCount'] / benchmark_median) - 1) * 100
-            vs_benchmark_str = f"{vs_benchmark_pct:+.1f}% vs typical"
-        else:
-            vs_benchmark_str = "N/A"
-        if approach_mode == "extra":
-            metric_cols_extra = st.columns(5)
-            with metric_cols_extra[0]:
-                st.markdown(f"<div class='metric-card'><b>Current Views</b><br>{video_details['viewCount']:,}</div>", unsafe_allow_html=True)
-            with metric_cols_extra[1]:
-                st.markdown(f"<div class='metric-card'><b>Typical Views</b><br>{int(benchmark_median):,}</div>", unsafe_allow_html=True)
-            with metric_cols_extra[2]:
-                st.markdown(f"<div class='metric-card'><b>Channel Average</b><br>{int(benchmark_avg):,}</div>", unsafe_allow_html=True)
-            with metric_cols_extra[3]:
-                st.markdown(f"<div class='metric-card'><b>Performance</b><br><span style='color:{performance_color}'>{vs_benchmark_str}</span></div>", unsafe_allow_html=True)
-            with metric_cols_extra[4]:
-                st.markdown(f"<div class='metric-card'><b>Ranking</b><br><span style='color:{performance_color}'>{percentile}</span></div>", unsafe_allow_html=True)
-            channel_stats_cols = st.columns(2)
-            with channel_stats_cols[0]:
-                st.metric("Channel VPH", f"{avg_vph:,.1f}")
-            with channel_stats_cols[1]:
-                st.metric("Channel Engagement Rate", f"{avg_engagement:,.1f}%")
-        else:
-            metric_cols = st.columns(4)
-            with metric_cols[0]:
-                st.markdown(f"<div class='metric-card'><b>Current Views</b><br>{video_details['viewCount']:,}</div>", unsafe_allow_html=True)
-            with metric_cols[1]:
-                st.markdown(f"<div class='metric-card'><b>Typical Views at this age</b><br>{int(benchmark_median):,}</div>", unsafe_allow_html=True)
-            with metric_cols[2]:
-                st.markdown(f"<div class='metric-card'><b>Performance</b><br><span style='color:{performance_color}'>{vs_benchmark_str}</span></div>", unsafe_allow_html=True)
-            with metric_cols[3]:
-                st.markdown(f"<div class='metric-card'><b>Ranking</b><br><span style='color:{performance_color}'>{percentile}</span></div>", unsafe_allow_html=True)
-        if show_data_tables:
-            st.markdown("<div class='subheader'>Data Tables</div>", unsafe_allow_html=True)
-            tabs = st.tabs(["Benchmark Data", "Video Performance Data"])
-            with tabs[0]:
-                st.write("### Typical Performance Benchmark")
-                st.dataframe(benchmark_stats)
-            with tabs[1]:
-                st.write("### Video Performance Data")
-                st.dataframe(video_performance)
-        st.markdown("<div class='subheader'>Download Data</div>", unsafe_allow_html=True)
-        col1, col2 = st.columns(2)
-        with col1:
-            st.download_button(
-                "Download Benchmark Data", 
-                benchmark_stats.to_csv(index=False), 
-                f"{channel_name.replace(' ', '_')}_benchmark_{video_type_str.replace(' ', '_')}.csv",
-                "text/csv",
-                key='download-benchmark'
-            )
-        with col2:
-            st.download_button(
-                "Download Video Performance Data", 
-                video_performance.to_csv(index=False),
-                f"{video_id}_performance_data.csv",
-                "text/csv",
-                key='download-performance'
-            )
+        render_performance_analysis(video_details, video_id, video_age, channel_name, video_type_str,
+                                    benchmark_stats, video_performance, avg_vph, avg_engagement,
+                                    percentile_range, approach_mode, show_data_tables, download_format)
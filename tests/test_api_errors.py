@@ -0,0 +1,46 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+from streamlit.testing.v1 import AppTest
+from urllib3 import HTTPResponse
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.util.retry import Retry
+
+APP_PATH = str(Path(__file__).resolve().parent.parent / 'app.py')
+API_KEY = 'AIzaSy-test-key-that-must-stay-hidden'
+
+
+@pytest.fixture
+def failing_api(monkeypatch):
+    # Answer every request at the connection level, so the session's Retry policy runs for real
+    requests_seen = []
+
+    def make_request(self, conn, method, url, **kwargs):
+        requests_seen.append(url)
+        body = json.dumps({'error': {'code': 503, 'message': 'The service is currently unavailable.'}})
+        return HTTPResponse(body=io.BytesIO(body.encode()), status=503, headers={'Content-Type': 'application/json'},
+                            preload_content=False, decode_content=False)
+
+    monkeypatch.setattr(HTTPConnectionPool, '_make_request', make_request)
+    monkeypatch.setattr(Retry, 'sleep', lambda self, response=None: None)
+    return requests_seen
+
+
+def test_exhausted_retries_hide_api_key(failing_api):
+    at = AppTest.from_file(APP_PATH, default_timeout=30)
+    at.secrets['YT_API_KEY'] = API_KEY
+    at.run()
+    at.text_input[0].input('https://www.youtube.com/channel/UCaaaaaaaaaaaaaaaaaaaaaa')
+    at.text_input[1].input('https://www.youtube.com/watch?v=aaaaaaaaaaa')
+    at.button[0].click()
+    at.run()
+
+    assert not at.exception
+    # The first call plus three retries, none of which put the key in the URL
+    assert len(failing_api) == 4
+    assert not any(API_KEY in url for url in failing_api)
+    errors = [error.value for error in at.error]
+    assert any('HTTP 503: The service is currently unavailable.' in error for error in errors)
+    assert not any(API_KEY in error for error in errors)